@@ -1,302 +1,507 @@
-from flat_log_parser import definitions
 from pathlib import Path
+import mmap
+import os
 import regex
 from pprint import pformat
-from dateutil.parser import parse, ParserError
-
-
-def flat_note_to_atoms(
-    in_path: Path, out_dir: Path, overwrite_ok: bool = False
-) -> list[str]:
-    notes = get_notes_from_path(path=in_path)
+from datetime import datetime
+from dataclasses import dataclass
+from contextlib import contextmanager
+import time
+
+# a single scan over the whole log yields the fields of each note directly. Fields are
+# anchored on literal separators rather than backreferences. The title runs to the first
+# ". " or "? " on its line, so it may contain inner dots but never a line break. The content
+# may span lines but stops at the start of the next note, so a note without tags is left
+# unmatched rather than absorbing the note after it. The pattern is bytes so it can scan
+# the memory mapped log without decoding it first
+_NOTE_RE = regex.compile(
+    rb"^(?P<datetime>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - "
+    rb"(?P<title>[^\n]+?)[.?] "
+    rb"(?P<content>(?:(?!\n\n\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).)*?) "
+    rb"tags: \[(?P<tags>[^\]]*)\]",
+    regex.DOTALL | regex.MULTILINE,
+)
+
+# the boundary between two notes, used to separate consecutive notes that didnt match
+_NOTE_BOUNDARY_RE = regex.compile(rb"\n\n(?=\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+# control characters and characters reserved in file names on POSIX or Windows
+_INVALID_NAME_RE = regex.compile(r'[\x00-\x1f/\\:*?"<>|]')
+
+# replaces spaces and removes quotation marks and punctuation from a title in one pass
+_CLEAN_NAME_TABLE = str.maketrans(
+    {" ": "_", '"': None, ",": None, "-": None, "'": None, "?": None, "^": None}
+)
+
+
+@dataclass
+class Notes:
+    """
+    the fields of the decomposed notes, stored as one list per field rather than one dict per
+    note. The lists are index aligned, so the fields of note `i` are found at index `i` of each.
+    """
 
-    decomp_notes = decompose_notes(notes=notes)
+    datetimes: list[str]
+    titles: list[str]
+    contents: list[str]
+    tags: list[str]
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def split(self, n_chunks: int) -> list["Notes"]:
+        """
+        split the notes into `n_chunks` contiguous chunks of near equal length
+        """
+        size, remainder = divmod(len(self), n_chunks)
+
+        chunks = []
+        start = 0
+        for i in range(n_chunks):
+            stop = start + size + (i < remainder)
+            chunks.append(
+                Notes(
+                    datetimes=self.datetimes[start:stop],
+                    titles=self.titles[start:stop],
+                    contents=self.contents[start:stop],
+                    tags=self.tags[start:stop],
+                )
+            )
+            start = stop
 
-    validate_datetimes(notes=decomp_notes)
+        return chunks
 
-    add_filenames(notes=decomp_notes)
 
-    parse_tags(notes=decomp_notes)
+@contextmanager
+def time_stage(timings: dict[str, int] | None, stage: str):
+    """
+    add the time taken by the enclosed block to `timings[stage]` in nanoseconds. Does nothing
+    if `timings` is None.
+    """
+    if timings is None:
+        yield
+        return
 
-    written_files = output_notes(
-        notes=decomp_notes, out_dir_path=out_dir, overwrite_ok=overwrite_ok
-    )
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0) + time.perf_counter_ns() - start
 
-    return written_files
 
+def flat_note_to_atoms(
+    in_path: Path, out_dir: Path, overwrite_ok: bool = False, profile: bool = False
+) -> list[str]:
+    """
+    parse the flat log at `in_path` and write each note as a file in `out_dir`, returning the
+    written paths. If `profile`, the time taken by each stage is printed once it completes.
+    """
+    timings = {} if profile else None
 
-def get_notes_from_path(path) -> list[str]:
-    with open(path, "r") as f:
-        string = f.read()
+    with time_stage(timings, "decompose"):
+        decomp_notes = get_notes_from_path(path=in_path)
 
-    pattern = r"(?<=\])\n\n(?=\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"
-    notes = regex.split(pattern=pattern, string=string)
+    with time_stage(timings, "output"):
+        written_files = output_notes(
+            notes=decomp_notes,
+            out_dir_path=out_dir,
+            overwrite_ok=overwrite_ok,
+            timings=timings,
+        )
 
-    # simple validation of the regex split. All notes should start with a '2' and end with a ']'
-    for note in notes:
-        if note[0] != "2":
-            raise ValueError("note doesnt start with a 2")
-        if note[-1] != "]":
-            raise ValueError("note doesnt end with a ']'")
+    if profile:
+        for stage, ns in timings.items():
+            print(f"{stage}: {ns / 1e6:.3f} ms")
 
-    return notes
+    return written_files
 
 
-def extract_note_fields(note: str) -> dict[str, str] | None:
-    regexps = dict(
-        datetime=r"(?P<datetime>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})",
-        separator=r" - ",
-        title=r"(?P<title>.+?(?=\.|\?))",
-        content=r"(?<=\2)\. (?P<content>.+?)(?= tag)",
-        tags=r"(?<=\3) tags: (?P<tags>.*)$",
-    )
+def get_notes_from_path(path) -> Notes:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
 
-    regexp = ""
-    for patt in regexps.values():
-        regexp += patt
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return decompose_notes(buffer=buffer)
 
-    match = regex.match(regexp, note)
 
-    if match:
-        fields = match.groupdict()
-    else:
-        fields = None
+def check_notes_without_matches(no_match_notes: dict[int, str]):
+    """
+    raise if any notes didnt match, reporting each by its index among all notes in the log
+    """
+    if not no_match_notes:
+        return
 
-    return fields
+    e = ValueError("some notes did not match the note pattern")
+    e.add_note(f"number of notes without match: {len(no_match_notes)}")
+    e.add_note(f"no match notes indexes: {list(no_match_notes)}")
+    e.add_note(f"notes that didnt match:\n\n{pformat(no_match_notes)}")
+    raise e
 
 
-def check_notes_without_matches(notes, decomposed_notes):
-    # number of notes that didnt match
-    n_no_match = len(notes) - len([note for note in decomposed_notes if note])
+def decompose_notes(buffer: bytes | mmap.mmap) -> Notes:
+    """
+    Decompose the UTF-8 encoded flat log `buffer` into `Notes` of prespecified fields: 'datetime', 'title', 'content', 'tags'. Any text between matches is treated as a note that didnt match. Only the captured fields and the text of notes that didnt match are decoded.
+    """
+    datetimes = []
+    titles = []
+    contents = []
+    tags = []
+
+    # the text of each note that didnt match, keyed by its index among all notes
+    no_match_notes = {}
+
+    def add_skipped(skipped: bytes) -> None:
+        # skipped text can hold several consecutive notes that didnt match
+        for note in _NOTE_BOUNDARY_RE.split(skipped):
+            note = note.strip()
+            if note:
+                no_match_notes[len(titles) + len(no_match_notes)] = note.decode(
+                    "utf-8", errors="replace"
+                )
 
-    # index of each that didnt match
-    no_match_indexes = [idx for idx, note in enumerate(decomposed_notes) if not note]
-    # the notes themselves
-    no_match_notes = [notes[i] for i in no_match_indexes]
+    end = 0
+    for match in _NOTE_RE.finditer(buffer):
+        add_skipped(buffer[end : match.start()])
 
-    if no_match_indexes:
-        with ValueError as e:
-            e.add_note(f"number of notes without match: {n_no_match}")
-            e.add_note(f"no match notes indexes: {no_match_indexes}")
-            e.add_note(
-                f"notes that didnt match:\n\n{pformat(dict(zip(no_match_indexes, no_match_notes)))}"
-            )
+        datetimes.append(match.group("datetime").decode("utf-8"))
+        titles.append(match.group("title").decode("utf-8"))
+        contents.append(match.group("content").decode("utf-8"))
+        tags.append(match.group("tags").decode("utf-8"))
+        end = match.end()
 
+    add_skipped(buffer[end:])
 
-def decompose_notes(notes) -> list[dict[str, str]]:
-    """
-    Decompose note strings in `notes` into a list of dicts of prespecified fields: 'datetime', 'title', 'content', 'tags'
-    """
-    decomposed_notes = [extract_note_fields(note) for note in notes]
-    check_notes_without_matches(decomposed_notes=decomposed_notes, notes=notes)
+    check_notes_without_matches(no_match_notes=no_match_notes)
 
-    if not any(decomposed_notes):
+    if not titles:
         raise ValueError("a match was not found in a note")
 
-    return decomposed_notes
+    return Notes(datetimes=datetimes, titles=titles, contents=contents, tags=tags)
 
 
-def validate_datetimes(notes: list[dict[str, str]]):
-    no_parse_date_notes = []
+def make_filename(title: str) -> str:
+    """
+    create a file name from `title`, cleaned for use as a file name. It is validated against the reserved characters and maximum length of a file name.
+    """
+    # clean and remove any trailing punctuation if present
+    name = title.lower().strip().rstrip("?,.")
 
-    for note in notes:
-        old_dt = note["datetime"]
-        try:
-            new_dt = parse(old_dt).isoformat()
-        except ParserError:
-            new_dt = old_dt
-            no_parse_date_notes.append(note)
-        note["datetime"] = new_dt
+    # replace spaces, remove quotation marks and add ".md"
+    name = name.translate(_CLEAN_NAME_TABLE) + ".md"
 
-    if no_parse_date_notes:
-        n_no_parse = len(no_parse_date_notes)
-        date_titles = [
-            {k: v for k, v in note.items() if k in ["title", "datetime"]}
-            for note in no_parse_date_notes
-        ]
-        err_str = f"Some note datetimes were unable to be parsed. {n_no_parse} were not parsed. They are as follows:\n\n{pformat(date_titles)}"
-        raise ValueError(err_str)
+    # validate the new name
+    if _INVALID_NAME_RE.search(name) or len(name.encode()) > 255:
+        raise ValueError(f"file name potentially invalid: {name}")
+
+    return name
 
 
-def add_filenames(notes: list[dict[str, str]]) -> list[dict[str, str]]:
+def parse_tags(title: str, tags: str) -> list[str]:
     """
-    add a 'file_name' pair whose value is created from the 'title' string, cleaned for use as a file name. It is validated by testing whether the new file can be written.
+    Convert the tags of the note `title` from a string to a list of strings.
     """
-    try:
-        temp_dir: Path = Path(definitions.ROOT).parent / "test_valid_names"
-
-        temp_dir.mkdir()
 
-        for note in notes:
-            title = note["title"]
+    # brackets are already excluded by the note regex. Empty tags, such as those left by a
+    # trailing comma, are dropped
+    cleaned_tags = [tag for tag in map(str.strip, tags.split(",")) if tag]
 
-            # clean
-            name = title.lower().strip()
+    if any(" " in tag for tag in cleaned_tags):
+        raise ValueError(f"something went wrong when parsing {title}, space detected..")
 
-            # remove any trailing punctuation if present
-            if name[-1] in ["?", ",", "."]:
-                name = name[:-1]
+    return cleaned_tags
 
-            # replace spaces
-            name = name.replace(" ", "_")
 
-            # add ".md"
-            name = name + ".md"
+import io
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-            # remove quotation marks
+# scalars which can be emitted unquoted without being read back as another type
+_PLAIN_SCALAR_RE = regex.compile(r"[^\W\d_][\w-]*")
+_YAML_KEYWORDS = {"y", "n", "yes", "no", "on", "off", "true", "false", "null"}
 
-            for char in ['"', ",", "-", "'", "?", "^"]:
-                name = name.replace(char, "")
+# the fewest notes given to a worker process. Below this the cost of starting the process
+# outweighs processing the notes in it
+_MIN_CHUNK_SIZE = 500
 
-            # test the new file
-            temp_outpath = temp_dir / name
 
-            try:
-                temp_outpath.touch(exist_ok=False)
-            except OSError as e:
-                e.add_note(f"file name potentially  invalid: {name}")
-                raise e
-            finally:
-                temp_outpath.unlink()
-                note["filename"] = name
-
-    except Exception as e:
-        raise e
-    finally:
-        temp_dir.rmdir()
+def validate_dir(out_dir_path: Path) -> None:
+    """
+    validate existance and character of `out_dir_path`
+    """
 
-    return notes
+    if not out_dir_path.exists():
+        raise ValueError("out_dir_path must exist")
+    if not out_dir_path.is_dir():
+        raise ValueError("out_dir_path must be a directory")
 
 
-def parse_tags(notes):
+def process_notes(
+    notes: Notes, out_dir_path: Path
+) -> list[dict[str, bytes | Path | str]]:
     """
-    Convert the tags from strings to lists of strings.
+    validate and clean each note and serialize it with its front matter, in a single pass
+    over the notes. Add modification date field 'mdt' at the time of serialization, shared by
+    all notes in the batch.
     """
 
-    # get the tags
+    posts = []
+    no_parse_date_notes = []
 
-    for note in notes:
-        tags = note["tags"].strip()
-        # remove brackets
-        tags_without_brackets = tags[1:-1].strip()
+    mdt = datetime.now().isoformat()
 
-        # if trailing comma, remove
+    for dt, title, content, tags in zip(
+        notes.datetimes, notes.titles, notes.contents, notes.tags
+    ):
+        try:
+            # the note regex already fixes the shape to YYYY-MM-DD HH:MM:SS, which
+            # fromisoformat parses without strptime's per call format regex lookup
+            cdt = datetime.fromisoformat(dt).isoformat()
+        except ValueError:
+            # keep going so that every unparseable datetime is reported together
+            no_parse_date_notes.append({"title": title, "datetime": dt})
+            continue
 
-        if tags_without_brackets[-1] == ",":
-            tags_without_brackets = tags_without_brackets[:-1]
+        filename = make_filename(title=title)
 
-        cleaned_tags = [tag.strip() for tag in tags_without_brackets.rsplit(",")]
+        # add mres tag, then drop duplicates and sort
+        cleaned_tags = sorted({*parse_tags(title=title, tags=tags), "mres"})
 
-        for tag in cleaned_tags:
-            if " " in tag:
-                raise ValueError(
-                    f"something went wrong when parsing {note['title']}, space detected.."
-                )
+        # add the title as a capitalized markdown header and a new line after the last line of
+        # content to bring it into line with standards
+        content = f"# {title.title()}\n\n{content}\n"
 
-        note["cleaned_tags"] = cleaned_tags
+        data = dumps_post(content=content, tags=cleaned_tags, cdt=cdt, mdt=mdt)
 
+        filepath = out_dir_path / filename
 
-import frontmatter
-from datetime import datetime
-import io
+        post_dict = {
+            "data": data.encode("utf-8"),
+            "path": filepath,
+            "filename": filename,
+        }
+        posts.append(post_dict)
 
+    if no_parse_date_notes:
+        n_no_parse = len(no_parse_date_notes)
+        err_str = f"Some note datetimes were unable to be parsed. {n_no_parse} were not parsed. They are as follows:\n\n{pformat(no_parse_date_notes)}"
+        raise ValueError(err_str)
 
-def validate_dir(out_dir_path: Path) -> None:
-    """
-    validate existance and character of `out_dir_path`
-    """
+    check_duplicate_filenames(posts=posts)
 
-    if not out_dir_path.exists():
-        raise ValueError("out_dir_path must exist")
-    if not out_dir_path.is_dir():
-        raise ValueError("out_dir_path must be a directory")
+    return posts
 
 
-def add_title_as_markdown(note: dict[str, str]) -> None:
+def check_duplicate_filenames(posts: list[dict[str, bytes | Path | str]]) -> None:
     """
-    add the 'title' value to the 'content' string as a capitalized markdown header
+    raise if any posts share a file name. As the posts are written concurrently, each file
+    must have a single writer.
     """
-    title = note["title"]
-    content = note["content"]
-    formatted_title = f"# {title.title()}"
-    note["content"] = f"{formatted_title}\n\n{content}"
+
+    filenames = set()
+    duplicate_filenames = []
+
+    for post in posts:
+        if post["filename"] in filenames:
+            duplicate_filenames.append(post["filename"])
+        filenames.add(post["filename"])
+
+    if duplicate_filenames:
+        n_duplicates = len(duplicate_filenames)
+        err_str = f"Some notes share a file name with an earlier note. {n_duplicates} would overwrite another note. Their file names are as follows:\n\n{pformat(duplicate_filenames)}"
+        raise ValueError(err_str)
 
 
-def add_new_line_after_content(note: dict[str, str]) -> None:
+def format_yaml_scalar(value: str) -> str:
     """
-    Adds a new line after the last line of content to bring it into line with standards
+    format `value` as a YAML string scalar, single quoting it unless it is unambiguously a
+    plain string
     """
 
-    note["content"] = note["content"] + "\n"
+    if _PLAIN_SCALAR_RE.fullmatch(value) and value.lower() not in _YAML_KEYWORDS:
+        return value
+
+    escaped = value.replace("'", "''")
+    return f"'{escaped}'"
 
 
-def add_mres_tag(note):
+def dumps_post(content: str, tags: list[str], cdt: str, mdt: str) -> str:
     """
-    add mres tag
+    serialize `content` to a string with YAML front matter holding `tags`, `cdt` and `mdt`. The
+    metadata schema is fixed so it is emitted directly rather than through PyYAML, in the same
+    layout previously written by python-frontmatter.
     """
 
-    note["cleaned_tags"].append("mres")
+    tags_list = "".join(f"\n- {format_yaml_scalar(tag)}" for tag in tags) or " []"
 
+    metadata = (
+        f"cdt: {format_yaml_scalar(cdt)}\n"
+        f"mdt: {format_yaml_scalar(mdt)}\n"
+        f"tags:{tags_list}"
+    )
 
-def dropping_duplicates_and_sorting_tags(note):
-    note["cleaned_tags"] = sorted(list(set(note["cleaned_tags"])))
+    return f"---\n{metadata}\n---\n\n{content}".strip()
 
 
-def form_posts(
-    notes: list[dict[str, str]], out_dir_path: Path
-) -> list[dict[str, frontmatter.Post | str]]:
+def write_post(
+    post: dict[str, bytes | Path | str], out_fd: int, overwrite_ok: bool = False
+) -> str:
     """
-    iterate over the notes and pass the information to Post objects. Add modification date
-    field 'mdt' at the time of Post object creation.
+    write the serialized `post` to its file name in the directory open as `out_fd`, on a raw
+    file descriptor, and return its path once written. Unless
+    `overwrite_ok`, the file is created exclusively so an existing file is detected by the
+    same call that opens it.
     """
 
-    frontmatter_objs = []
-
-    for note in notes:
-        add_mres_tag(note=note)
-        dropping_duplicates_and_sorting_tags(note=note)
-        add_title_as_markdown(note=note)
-        add_new_line_after_content(note=note)
-
-        post = frontmatter.Post(content=note["content"])
-        post["tags"] = note["cleaned_tags"]
-        post["cdt"] = note["datetime"]
-        post["mdt"] = datetime.now().isoformat()
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if not overwrite_ok:
+        flags |= os.O_EXCL
 
-        filepath = out_dir_path / note["filename"]
+    try:
+        fd = os.open(post["filename"], flags, 0o644, dir_fd=out_fd)
+    except FileExistsError as e:
+        raise RuntimeError(
+            f"{post['path']} already exists. To overwrite set `overwite_ok` to True"
+        ) from e
 
-        post_dict = {"post": post, "path": filepath}
-        frontmatter_objs.append(post_dict)
+    try:
+        # os.write can write fewer bytes than given, so write until none remain
+        data = memoryview(post["data"])
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
 
-    return frontmatter_objs
+    return str(post["path"])
 
 
 def write_notes(
-    posts: list[dict[str, frontmatter.Post | str]], overwrite_ok: bool = False
+    posts: list[dict[str, bytes | Path | str]],
+    out_fd: int,
+    overwrite_ok: bool = False,
 ) -> list[str]:
     """
-    write the posts to their internally stored path
+    write the posts to their internally stored file name in the output directory open as
+    `out_fd`. The writes are run concurrently as they are IO-bound.
     """
 
     written_files = []
+    error = None
 
-    for post in posts:
-        path = str(post["path"])
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(write_post, post, out_fd, overwrite_ok) for post in posts
+        ]
 
-        if Path(path).exists() and not overwrite_ok:
-            raise RuntimeError(
-                f"{path} already exists. To overwrite set `overwite_ok` to True"
-            )
-        else:
-            print(f"writing to {path}")
-            written_files.append(path)
-            frontmatter.dump(post=post["post"], fd=path)
+        # record every file that was written, even if another write failed, then raise the
+        # first failure
+        for future in futures:
+            try:
+                path = future.result()
+            except Exception as e:
+                error = error or e
+            else:
+                print(f"wrote {path}")
+                written_files.append(path)
+
+    if error:
+        error.add_note(f"files written before the failure:\n\n{pformat(written_files)}")
+        raise error
 
     return written_files
 
 
-def output_notes(notes, out_dir_path, overwrite_ok: bool = False) -> list[str]:
-    posts = form_posts(notes=notes, out_dir_path=out_dir_path)
-    written_files = write_notes(posts=posts, overwrite_ok=overwrite_ok)
+def process_chunk(
+    notes: Notes,
+    out_dir_path,
+    timings: dict[str, int] | None = None,
+) -> tuple[list[dict[str, bytes | Path | str]], dict[str, int] | None]:
+    """
+    process a chunk of notes, returning the posts along with `timings` so the stage timed in a
+    worker process reaches the caller
+    """
+    with time_stage(timings, "process"):
+        posts = process_notes(notes=notes, out_dir_path=out_dir_path)
 
-    return written_files
+    return posts, timings
+
+
+def process_chunks(
+    notes: Notes,
+    out_dir_path,
+    n_chunks: int,
+    timings: dict[str, int] | None = None,
+) -> list[dict[str, bytes | Path | str]]:
+    """
+    process the notes split into `n_chunks` chunks in parallel worker processes. Every chunk
+    is processed before raising, so the errors of all chunks are reported together. The
+    'process' timings of the chunks are summed, so they are the total time spent across all
+    workers.
+    """
+
+    posts = []
+    errors = []
+
+    with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+        # each worker receives its own copy of the empty timings and returns it filled
+        futures = [
+            executor.submit(
+                process_chunk, chunk, out_dir_path, None if timings is None else {}
+            )
+            for chunk in notes.split(n_chunks)
+        ]
+
+        for future in futures:
+            try:
+                chunk_posts, chunk_timings = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            posts.extend(chunk_posts)
+
+            if timings is not None:
+                for stage, ns in chunk_timings.items():
+                    timings[stage] = timings.get(stage, 0) + ns
+
+    if errors:
+        error = errors[0]
+        for other in errors[1:]:
+            error.add_note(f"another chunk also failed: {other!r}")
+        raise error
+
+    # notes in different chunks can share a file name too
+    check_duplicate_filenames(posts=posts)
+
+    return posts
+
+
+def output_notes(
+    notes: Notes,
+    out_dir_path,
+    overwrite_ok: bool = False,
+    timings: dict[str, int] | None = None,
+) -> list[str]:
+    """
+    process and write the notes. As every note is independent, large batches are split into
+    chunks which are processed in parallel worker processes. Nothing is written unless every
+    note is processed without error.
+    """
+
+    n_chunks = min(os.cpu_count() or 1, len(notes) // _MIN_CHUNK_SIZE)
+
+    if n_chunks <= 1:
+        with time_stage(timings, "process"):
+            posts = process_notes(notes=notes, out_dir_path=out_dir_path)
+    else:
+        posts = process_chunks(
+            notes=notes, out_dir_path=out_dir_path, n_chunks=n_chunks, timings=timings
+        )
+
+    # open the output directory once so each note is opened relative to it rather than
+    # resolving its full path
+    with time_stage(timings, "write"):
+        out_fd = os.open(out_dir_path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            return write_notes(posts=posts, out_fd=out_fd, overwrite_ok=overwrite_ok)
+        finally:
+            os.close(out_fd)
@@ -0,0 +1,257 @@
+import os
+from pprint import pformat
+
+import pytest
+import yaml
+
+from flat_log_parser import functions
+from flat_log_parser.functions import (
+    Notes,
+    decompose_notes,
+    dumps_post,
+    make_filename,
+    output_notes,
+    process_notes,
+    write_notes,
+    write_post,
+)
+
+
+def test_decompose_notes_splits_valid_log():
+    log = (
+        b"2024-01-01 10:00:00 - Quick fix. Fixed it. tags: [a, b,]\n\n"
+        b"2024-01-02 09:00:00 - Why does it fail? Multi\n\nline content. tags: [c]\n\n"
+        b"2024-01-03 09:00:00 - Version 1.2 release notes. Content. tags: [v, w]"
+    )
+
+    notes = decompose_notes(buffer=log)
+
+    assert notes.datetimes == [
+        "2024-01-01 10:00:00",
+        "2024-01-02 09:00:00",
+        "2024-01-03 09:00:00",
+    ]
+    assert notes.titles == [
+        "Quick fix",
+        "Why does it fail",
+        "Version 1.2 release notes",
+    ]
+    assert notes.contents == ["Fixed it.", "Multi\n\nline content.", "Content."]
+    assert notes.tags == ["a, b,", "c", "v, w"]
+
+
+@pytest.mark.parametrize(
+    "log",
+    [
+        pytest.param(
+            b"2024-01-04 09:00:00 - No tags here. Content\n\n"
+            b"2024-01-05 09:00:00 - After. Content. tags: [z]",
+            id="note without tags does not absorb the next note",
+        ),
+        pytest.param(
+            b"2024-01-01 10:00:00 - Quick fix\nDetails here. More text. tags: [a]",
+            id="title spanning lines",
+        ),
+        pytest.param(
+            b"preamble\n\n2024-01-01 10:00:00 - Title. Content. tags: [a]",
+            id="text before the first note",
+        ),
+    ],
+)
+def test_decompose_notes_reports_notes_without_match(log):
+    with pytest.raises(ValueError, match="some notes did not match"):
+        decompose_notes(buffer=log)
+
+
+@pytest.mark.parametrize("title", ["Quick fix\nDetails here", "Tab\tseparated", "a/b"])
+def test_make_filename_rejects_invalid_characters(title):
+    with pytest.raises(ValueError, match="file name potentially invalid"):
+        make_filename(title=title)
+
+
+@pytest.mark.parametrize(
+    "tags",
+    [
+        ["mres", "pipeline"],
+        ["yes", "on", "null", "~", "1a", "#x", "2024-01-01"],
+        ["No", "TRUE", "it's", "a:b", "-x", "ünï"],
+        [],
+    ],
+)
+def test_dumps_post_front_matter_round_trips_through_yaml(tags):
+    content = "# Title\n\nSome content.\n"
+    cdt = "2024-01-01T10:00:00"
+    mdt = "2024-06-01T12:30:00.123456"
+
+    post = dumps_post(content=content, tags=tags, cdt=cdt, mdt=mdt)
+
+    _, front_matter, body = post.split("---\n", 2)
+
+    assert yaml.safe_load(front_matter) == {"cdt": cdt, "mdt": mdt, "tags": tags}
+    assert body == "\n" + content.strip()
+
+
+def test_decompose_notes_counts_consecutive_notes_without_match():
+    log = (
+        b"2024-01-01 10:00:00 - First. Content. tags: [a]\n\n"
+        b"2024-01-02 10:00:00 - No tags. Content\n\n"
+        b"2024-01-03 10:00:00 - No tags either. Content\n\n"
+        b"2024-01-04 10:00:00 - Last. Content. tags: [b]"
+    )
+
+    with pytest.raises(ValueError) as excinfo:
+        decompose_notes(buffer=log)
+
+    assert "number of notes without match: 2" in excinfo.value.__notes__
+    assert "no match notes indexes: [1, 2]" in excinfo.value.__notes__
+
+
+def test_decompose_notes_reports_unmatched_notes_as_text():
+    log = (
+        b"2024-01-01 10:00:00 - First. Content. tags: [a]\n\n"
+        b"2024-01-02 10:00:00 - No tags. Caf\xc3\xa9 \xff"
+    )
+
+    with pytest.raises(ValueError) as excinfo:
+        decompose_notes(buffer=log)
+
+    report = excinfo.value.__notes__[-1]
+    assert "No tags. Café �" in report
+    assert "b'" not in report
+
+
+def test_process_notes_rejects_duplicate_file_names(tmp_path):
+    notes = Notes(
+        datetimes=["2024-01-01 10:00:00", "2024-01-02 10:00:00"],
+        titles=["Same title", "same title?"],
+        contents=["First.", "Second."],
+        tags=["a", "b"],
+    )
+
+    with pytest.raises(ValueError, match="same_title.md"):
+        process_notes(notes=notes, out_dir_path=tmp_path)
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    """
+    force `output_notes` to split even a few notes across two worker processes
+    """
+    monkeypatch.setattr(functions.os, "cpu_count", lambda: 2)
+    monkeypatch.setattr(functions, "_MIN_CHUNK_SIZE", 1)
+
+
+def make_notes(n: int) -> Notes:
+    return Notes(
+        datetimes=[f"2024-01-0{i + 1} 10:00:00" for i in range(n)],
+        titles=[f"Note {i}" for i in range(n)],
+        contents=[f"Content {i}." for i in range(n)],
+        tags=["a"] * n,
+    )
+
+
+def test_output_notes_writes_every_chunk(tmp_path, chunked):
+    timings = {}
+
+    written_files = output_notes(
+        notes=make_notes(4), out_dir_path=tmp_path, timings=timings
+    )
+
+    assert written_files == [str(tmp_path / f"note_{i}.md") for i in range(4)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"note_{i}.md" for i in range(4)
+    ]
+    assert set(timings) == {"process", "write"}
+
+
+def test_output_notes_writes_nothing_if_any_chunk_fails(tmp_path, chunked):
+    notes = make_notes(4)
+    notes.datetimes[-1] = "2024-13-01 10:00:00"
+
+    with pytest.raises(ValueError, match="unable to be parsed"):
+        output_notes(notes=notes, out_dir_path=tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_output_notes_rejects_duplicate_file_names_across_chunks(tmp_path, chunked):
+    notes = make_notes(4)
+    notes.titles[-1] = notes.titles[0]
+
+    with pytest.raises(ValueError, match="note_0.md"):
+        output_notes(notes=notes, out_dir_path=tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def out_fd(tmp_path):
+    fd = os.open(tmp_path, os.O_RDONLY | os.O_DIRECTORY)
+    yield fd
+    os.close(fd)
+
+
+def test_process_notes_serializes_each_note(tmp_path):
+    posts = process_notes(notes=make_notes(2), out_dir_path=tmp_path)
+
+    assert [post["filename"] for post in posts] == ["note_0.md", "note_1.md"]
+    assert [post["path"] for post in posts] == [
+        tmp_path / "note_0.md",
+        tmp_path / "note_1.md",
+    ]
+
+    front_matter, body = posts[0]["data"].decode("utf-8").split("---\n")[1:]
+    assert yaml.safe_load(front_matter)["tags"] == ["a", "mres"]
+    assert body == "\n# Note 0\n\nContent 0."
+
+
+def test_write_post_refuses_to_overwrite(tmp_path, out_fd):
+    (post,) = process_notes(notes=make_notes(1), out_dir_path=tmp_path)
+    post["path"].write_bytes(b"existing")
+
+    with pytest.raises(RuntimeError, match="already exists"):
+        write_post(post=post, out_fd=out_fd)
+
+    assert post["path"].read_bytes() == b"existing"
+
+
+def test_write_post_overwrites_if_ok(tmp_path, out_fd):
+    (post,) = process_notes(notes=make_notes(1), out_dir_path=tmp_path)
+    post["path"].write_bytes(b"a longer existing file than the post")
+
+    assert write_post(post=post, out_fd=out_fd, overwrite_ok=True) == str(post["path"])
+    assert post["path"].read_bytes() == post["data"]
+
+
+def test_write_notes_reports_files_written_before_a_failure(tmp_path, out_fd):
+    posts = process_notes(notes=make_notes(3), out_dir_path=tmp_path)
+    posts[1]["path"].write_bytes(b"existing")
+
+    with pytest.raises(RuntimeError) as excinfo:
+        write_notes(posts=posts, out_fd=out_fd)
+
+    written_files = [str(posts[0]["path"]), str(posts[2]["path"])]
+    assert excinfo.value.__notes__ == [
+        f"files written before the failure:\n\n{pformat(written_files)}"
+    ]
+    assert posts[0]["path"].read_bytes() == posts[0]["data"]
+    assert posts[1]["path"].read_bytes() == b"existing"
+    assert posts[2]["path"].read_bytes() == posts[2]["data"]
+
+
+@pytest.mark.parametrize("overwrite_ok", [False, True])
+def test_output_notes_overwrites_only_if_ok(tmp_path, overwrite_ok):
+    existing = tmp_path / "note_0.md"
+    existing.write_bytes(b"existing")
+
+    if overwrite_ok:
+        written_files = output_notes(
+            notes=make_notes(2), out_dir_path=tmp_path, overwrite_ok=True
+        )
+        assert written_files == [str(existing), str(tmp_path / "note_1.md")]
+        assert existing.read_bytes().startswith(b"---\n")
+    else:
+        with pytest.raises(RuntimeError, match="already exists"):
+            output_notes(notes=make_notes(2), out_dir_path=tmp_path)
+        assert existing.read_bytes() == b"existing"
+        assert (tmp_path / "note_1.md").exists()